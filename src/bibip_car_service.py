@@ -1,7 +1,12 @@
+import bisect
+import heapq
+import mmap
 import os
-import json
+import pickle
+from collections.abc import Iterator
 from decimal import Decimal
 from datetime import datetime
+from functools import cached_property
 
 from models import Car, CarFullInfo, CarStatus, Model, ModelSaleStats, Sale
 
@@ -13,7 +18,10 @@ class CarService:
     CAR_INDEX_FILE = "cars_index.txt"
     SALES_FILE = "sales.txt"
     SALES_INDEX_FILE = "sales_index.txt"
-    LINE_LENGTH = 500  # Фиксированная длина строки
+    LINE_LENGTH = 500  # Максимальная длина строки без перевода строки
+    STATUS_LENGTH = max(len(status.value) for status in CarStatus)  # Статус дополняется пробелами до этой длины
+    DELETED = -1  # Смещение в индексе для удалённого ключа
+    APPEND_BUFFER_SIZE = 128 * 1024  # Сколько байт копить в буфере дописывания до сброса на диск
 
     def __init__(self, root_directory_path: str) -> None:
         self.root_directory_path = root_directory_path
@@ -24,130 +32,426 @@ class CarService:
         self.sales_file_path = os.path.join(root_directory_path, self.SALES_FILE)
         self.sales_index_file_path = os.path.join(root_directory_path, self.SALES_INDEX_FILE)
 
+        # Файлы держим открытыми всё время жизни сервиса, закрываются в close()
+        self._append_fds = {
+            path: os.open(path, os.O_APPEND | os.O_RDWR | os.O_CREAT, 0o644)
+            for path in (
+                self.model_file_path,
+                self.model_index_file_path,
+                self.car_file_path,
+                self.car_index_file_path,
+                self.sales_file_path,
+                self.sales_index_file_path,
+            )
+        }
+        # Недописанная при падении последняя строка отрезается, иначе следующая запись склеится с ней
+        for fd in self._append_fds.values():
+            self._drop_torn_tail(fd)
+        self._model_fd = os.open(self.model_file_path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._car_fd = os.open(self.car_file_path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._sales_fd = os.open(self.sales_file_path, os.O_RDWR | os.O_CREAT, 0o644)
+        # Отображения файлов в память для чтения, создаются по первому обращению
+        self._mmaps: dict[int, mmap.mmap] = {}
+        # Готовые байты статуса, уже дополненные пробелами до STATUS_LENGTH
+        self._status_bytes = {status: status.value.encode().ljust(self.STATUS_LENGTH) for status in CarStatus}
+        # Загруженные индексы по пути журнала; в close() сохраняются в снимки только они
+        self._loaded_indexes: dict[str, dict[str, int]] = {}
+        # Отложенная запись: всё, что дописывается в конец файлов, копится в буферах
+        # и уходит на диск одним write() при переполнении, перед чтением и в flush().
+        # Порядок ключей как в _append_fds: файл данных всегда раньше своего индекса
+        self._dirty_buffers = {path: bytearray() for path in self._append_fds}
+
+        # Обратный индекс VIN -> (номер продажи, сумма, дата), чтобы не искать продажу перебором
+        self._vin_to_sale: dict[str, tuple[str, Decimal, datetime]] = {}
+        for row in self._read_rows(self._sales_fd):
+            if row.startswith(b" "):
+                continue
+            data = row.decode().strip().split(";")
+            self._vin_to_sale[data[1]] = (data[0], Decimal(data[2]), datetime.fromisoformat(data[3]))
+
+        # Отсортированные цены проданных машин по моделям (в копейках), строятся при первом
+        # запросе топа моделей и дальше поддерживаются при каждой продаже и отмене
+        self._sold_prices_by_model: dict[str, list[int]] | None = None
+
+    # Индексы читаются с диска при первом обращении, дальше дополняются в памяти.
+    # Процесс, которому нужна только часть операций, не строит словари остальных индексов
+    @cached_property
+    def _model_index(self) -> dict[str, int]:
+        return self._load_index(self.model_index_file_path)
+
+    @cached_property
+    def _car_index(self) -> dict[str, int]:
+        return self._load_index(self.car_index_file_path)
+
+    @cached_property
+    def _sales_index(self) -> dict[str, int]:
+        return self._load_index(self.sales_index_file_path)
+
+    # Агрегаты продаж по моделям; при первом обращении собираются по проданным машинам,
+    # из строки машины берутся только модель и цена, без сборки Car
+    def _sold_prices(self) -> dict[str, list[int]]:
+        if self._sold_prices_by_model is not None:
+            return self._sold_prices_by_model
+        sold_prices: dict[str, list[int]] = {}
+        for vin in self._vin_to_sale:
+            offset = self._car_index.get(vin)
+            if offset is None:
+                continue
+            model_id, price = self._model_and_cents(offset)
+            sold_prices.setdefault(model_id, []).append(price)
+        for prices in sold_prices.values():
+            prices.sort()
+        self._sold_prices_by_model = sold_prices
+        return sold_prices
+
     # Задание 1: Добавление модели
     def add_model(self, model: Model) -> Model:
-        model_index = self._load_index(self.model_index_file_path)
-        line_number = len(model_index)
-
-        model_str = f"{model.id};{model.name};{model.brand}".ljust(self.LINE_LENGTH) + "\n"
+        offset = self._end_offset(self._model_fd, self.model_file_path)
+        self._buffer_append(self.model_file_path, self._encode_row(str(model.id).encode(), model.name.encode(), model.brand.encode()))
 
-        with open(self.model_file_path, "a") as f:
-            f.write(model_str)
-
-        model_index[model.id] = line_number
-        self._save_index(self.model_index_file_path, model_index)
+        self._model_index[model.index()] = offset
+        self._buffer_append(self.model_index_file_path, f"{model.index()};{offset}\n".encode())
 
         return model
 
     # Задание 1: Добавление автомобиля
     def add_car(self, car: Car) -> Car:
-        car_index = self._load_index(self.car_index_file_path)
-        line_number = len(car_index)
-
-        car_str = f"{car.vin};{car.model};{car.price};{car.date_start};{car.status.value}".ljust(self.LINE_LENGTH) + "\n"
+        offset = self._end_offset(self._car_fd, self.car_file_path)
+        self._buffer_append(self.car_file_path, self._encode_car(car))
 
-        with open(self.car_file_path, "a") as f:
-            f.write(car_str)
-
-        car_index[car.vin] = line_number
-        self._save_index(self.car_index_file_path, car_index)
+        self._car_index[car.index()] = offset
+        self._buffer_append(self.car_index_file_path, f"{car.index()};{offset}\n".encode())
 
         return car
 
     # Задание 2: Продажа автомобиля
     def sell_car(self, sale: Sale) -> Car:
-        sales_index = self._load_index(self.sales_index_file_path)
-        line_number = len(sales_index)
+        car_index = self._car_index
+        if sale.car_vin not in car_index:
+            raise ValueError("VIN not found")
+        if sale.car_vin in self._vin_to_sale:
+            raise ValueError("Car is already sold")
+        if sale.sales_number in self._sales_index:
+            raise ValueError("Sale already exists")
+        # Модель и цена читаются до первого изменения, чтобы ошибка разбора не оставила продажу наполовину
+        model_id, price = self._model_and_cents(car_index[sale.car_vin])
 
-        sale_str = f"{sale.sales_number};{sale.car_vin};{sale.cost};{sale.sales_date}".ljust(self.LINE_LENGTH) + "\n"
+        offset = self._end_offset(self._sales_fd, self.sales_file_path)
 
-        with open(self.sales_file_path, "a") as f:
-            f.write(sale_str)
+        self._buffer_append(self.sales_file_path, self._encode_sale(sale.sales_number, sale.car_vin, sale.cost, sale.sales_date))
 
-        sales_index[sale.sales_number] = line_number
-        self._save_index(self.sales_index_file_path, sales_index)
+        self._sales_index[sale.sales_number] = offset
+        self._buffer_append(self.sales_index_file_path, f"{sale.sales_number};{offset}\n".encode())
+        self._vin_to_sale[sale.car_vin] = (sale.sales_number, sale.cost, sale.sales_date)
 
-        return self.get_car_info(sale.car_vin)
+        car = self._set_car_status(car_index[sale.car_vin], CarStatus.sold)
+        self._count_sale(model_id, price, 1)
+        return car
 
     # Задание 3: Получить список машин по статусу
     def get_cars(self, status: CarStatus) -> list[Car]:
         cars = []
-        with open(self.car_file_path, "r") as f:
-            for line in f:
-                data = line.strip().split(";")
-                if data and len(data) >= 5 and data[4] == status.value:
-                    cars.append(Car(vin=data[0], model=int(data[1]), price=Decimal(data[2]), date_start=datetime.fromisoformat(data[3]), status=status))
+        # Статус - последнее поле строки, поэтому разбираем только подходящие строки
+        suffix = f";{status.value}".encode()
+        # Машины часто поступают партиями в один день, одинаковые даты разбираем один раз
+        dates: dict[str, datetime] = {}
+        for row in self._read_rows(self._car_fd):
+            row = row.rstrip()
+            if row.endswith(suffix):
+                data = row.decode().split(";")
+                date_start = dates.get(data[3])
+                if date_start is None:
+                    date_start = dates[data[3]] = datetime.fromisoformat(data[3])
+                cars.append(Car(vin=data[0], model=int(data[1]), price=Decimal(data[2]), date_start=date_start, status=status))
         return cars
 
     # Задание 4: Получить информацию по VIN
     def get_car_info(self, vin: str) -> CarFullInfo | None:
-        car_index = self._load_index(self.car_index_file_path)
+        car_index = self._car_index
         if vin not in car_index:
             return None
 
-        with open(self.car_file_path, "r") as f:
-            f.seek(car_index[vin] * (self.LINE_LENGTH + 1))
-            data = f.read(self.LINE_LENGTH).strip().split(";")
-            return CarFullInfo(
-                vin=data[0],
-                car_model_name=data[1],
-                car_model_brand=data[2],
-                price=Decimal(data[3]),
-                date_start=datetime.fromisoformat(data[4]),
-                status=CarStatus(data[5]),
-                sales_date=None,
-                sales_cost=None
-            )
+        car_data = self._read_row(self._car_fd, car_index[vin])
+        model_data = self._read_row(self._model_fd, self._model_index[car_data[1]])
+
+        _, sales_cost, sales_date = self._vin_to_sale.get(vin, (None, None, None))
+
+        return CarFullInfo(
+            vin=car_data[0],
+            car_model_name=model_data[1],
+            car_model_brand=model_data[2],
+            price=Decimal(car_data[2]),
+            date_start=datetime.fromisoformat(car_data[3]),
+            status=CarStatus(car_data[4]),
+            sales_date=sales_date,
+            sales_cost=sales_cost,
+        )
 
     # Задание 5: Обновление VIN
     def update_vin(self, vin: str, new_vin: str) -> Car:
-        car_index = self._load_index(self.car_index_file_path)
+        car_index = self._car_index
         if vin not in car_index:
             raise ValueError("VIN not found")
+        if new_vin in car_index:
+            raise ValueError("VIN already exists")
+
+        # Новый VIN может быть другой длины, поэтому строка переезжает в конец файла,
+        # а старая затирается пробелами
+        old_offset = car_index.pop(vin)
+        car = self._car_from_row(self._read_row(self._car_fd, old_offset))
+        car.vin = new_vin
+
+        offset = self._end_offset(self._car_fd, self.car_file_path)
+        self._buffer_append(self.car_file_path, self._encode_car(car))
+        car_index[new_vin] = offset
+        self._buffer_append(self.car_index_file_path, f"{vin};{self.DELETED}\n{new_vin};{offset}\n".encode())
+
+        # Строка продажи тоже хранит VIN, поэтому у проданной машины переезжает и она:
+        # иначе отмена продажи и пересборка агрегатов при старте искали бы старый VIN
+        sale = self._vin_to_sale.pop(vin, None)
+        old_sale_offset = None
+        if sale is not None:
+            sales_number, cost, sales_date = sale
+            old_sale_offset = self._sales_index[sales_number]
+            sale_offset = self._end_offset(self._sales_fd, self.sales_file_path)
+            self._buffer_append(self.sales_file_path, self._encode_sale(sales_number, new_vin, cost, sales_date))
+            self._sales_index[sales_number] = sale_offset
+            self._buffer_append(self.sales_index_file_path, f"{sales_number};{sale_offset}\n".encode())
+            self._vin_to_sale[new_vin] = sale
+
+        # Старые строки затираются только после того, как новые записаны
+        self._erase_row(self._car_fd, old_offset)
+        if old_sale_offset is not None:
+            self._erase_row(self._sales_fd, old_sale_offset)
 
-        line_number = car_index[vin]
-        del car_index[vin]
-        car_index[new_vin] = line_number
-        self._save_index(self.car_index_file_path, car_index)
-
-        return self.get_car_info(new_vin)
+        return car
 
     # Задание 6: Удаление продажи
     def revert_sale(self, sales_number: str) -> Car:
-        sales_index = self._load_index(self.sales_index_file_path)
+        sales_index = self._sales_index
         if sales_number not in sales_index:
             raise ValueError("Sale not found")
 
+        # Всё, что нужно для отмены, находится и проверяется до первого изменения,
+        # чтобы ошибка не оставила продажу удалённой наполовину
+        offset = sales_index[sales_number]
+        sale_data = self._read_row(self._sales_fd, offset)
+        if len(sale_data) < 2 or sale_data[1] not in self._vin_to_sale or sale_data[1] not in self._car_index:
+            raise ValueError("Car of the sale not found")
+        car_vin = sale_data[1]
+        model_id, price = self._model_and_cents(self._car_index[car_vin])
+
+        # Строка продажи затирается пробелами на месте, остальной файл не трогаем
         del sales_index[sales_number]
-        self._save_index(self.sales_index_file_path, sales_index)
+        del self._vin_to_sale[car_vin]
+        self._buffer_append(self.sales_index_file_path, f"{sales_number};{self.DELETED}\n".encode())
+        self._erase_row(self._sales_fd, offset)
 
-        return None  # Продажа удалена
+        car = self._set_car_status(self._car_index[car_vin], CarStatus.available)
+        self._count_sale(model_id, price, -1)
+        return car
 
     # Задание 7: Топ-3 продаваемые модели
     def top_models_by_sales(self) -> list[ModelSaleStats]:
-        sales_count = {}
-        with open(self.sales_file_path, "r") as f:
-            for line in f:
-                data = line.strip().split(";")
-                if data:
-                    model_id = int(data[1])  # VIN указывает на модель
-                    sales_count[model_id] = sales_count.get(model_id, 0) + 1
-
-        sorted_models = sorted(sales_count.items(), key=lambda x: x[1], reverse=True)[:3]
-        return [ModelSaleStats(id=model_id, count=count) for model_id, count in sorted_models]
-
-    # Метод загрузки индекса из файла
+        # При равном числе продаж выше та модель, у которой дороже машины
+        sorted_models = heapq.nlargest(
+            3, self._sold_prices().items(), key=lambda item: (len(item[1]), item[1][-1])
+        )
+
+        top_models = []
+        for model_id, prices in sorted_models:
+            data = self._read_row(self._model_fd, self._model_index[model_id])
+            top_models.append(ModelSaleStats(car_model_name=data[1], brand=data[2], sales_number=len(prices)))
+        return top_models
+
+    # Сброс накопленных буферов на диск. До вызова flush() или close() последние
+    # добавленные строки и записи индексов при падении процесса теряются;
+    # продажа, отмена продажи и смена VIN сбрасывают буферы сами перед правкой на месте
+    def flush(self) -> None:
+        for file_path, buffer in self._dirty_buffers.items():
+            if buffer:
+                self._append_bytes(file_path, buffer)
+                buffer.clear()
+
+    # Закрытие файлов, после вызова сервисом пользоваться нельзя.
+    # Перед закрытием буферы сбрасываются, индексы сохраняются в снимки, а журналы очищаются
+    def close(self) -> None:
+        self.flush()
+        # Незагруженный индекс не менялся, его снимок и журнал остаются как есть
+        for index_file_path, index in self._loaded_indexes.items():
+            self._checkpoint_index(index_file_path, index)
+
+        for mm in self._mmaps.values():
+            mm.close()
+        for fd in self._append_fds.values():
+            os.close(fd)
+        os.close(self._model_fd)
+        os.close(self._car_fd)
+        os.close(self._sales_fd)
+
+    # Сборка машины из полей строки
+    def _car_from_row(self, data: list[str]) -> Car:
+        return Car(vin=data[0], model=int(data[1]), price=Decimal(data[2]), date_start=datetime.fromisoformat(data[3]), status=CarStatus(data[4]))
+
+    # Строка машины; статус дополнен пробелами, чтобы его можно было менять на месте
+    def _encode_car(self, car: Car) -> bytes:
+        return self._encode_row(
+            car.vin.encode(), str(car.model).encode(), format(car.price, "f").encode(), str(car.date_start).encode(), self._status_bytes[car.status]
+        )
+
+    # Строка продажи
+    def _encode_sale(self, sales_number: str, car_vin: str, cost: Decimal, sales_date: datetime) -> bytes:
+        return self._encode_row(sales_number.encode(), car_vin.encode(), format(cost, "f").encode(), str(sales_date).encode())
+
+    # Замена статуса машины прямо в файле: перезаписывается только поле статуса в конце строки.
+    # Правка на месте попадает на диск сразу, поэтому перед ней сбрасываются буферы -
+    # иначе после падения статус останется, а продажа, из-за которой он изменился, пропадёт
+    def _set_car_status(self, offset: int, status: CarStatus) -> Car:
+        self.flush()
+        row = self._read_line(self._car_fd, offset)
+        os.pwrite(self._car_fd, self._status_bytes[status], offset + len(row) - self.STATUS_LENGTH)
+
+        car = self._car_from_row(row.decode().rstrip().split(";"))
+        car.status = status
+        return car
+
+    # Дописывание строки в буфер файла. При переполнении сбрасываются все буферы, а не только
+    # этот: иначе журнал индекса мог бы попасть на диск раньше строк, на которые указывает.
+    # flush() пишет каждый файл данных перед его индексом
+    def _buffer_append(self, file_path: str, buf: bytes) -> None:
+        buffer = self._dirty_buffers[file_path]
+        buffer += buf
+        if len(buffer) >= self.APPEND_BUFFER_SIZE:
+            self.flush()
+
+    # Дописывание готового буфера в конец файла одним системным вызовом
+    def _append_bytes(self, file_path: str, buf: bytes) -> None:
+        os.write(self._append_fds[file_path], buf)
+
+    # Строка из уже закодированных полей через ";" с переводом строки в конце;
+    # собирается одним bytes.join без промежуточных строк
+    def _encode_row(self, *fields: bytes) -> bytes:
+        row = b";".join(fields)
+        if len(row) > self.LINE_LENGTH:
+            raise ValueError(f"Row is longer than {self.LINE_LENGTH} bytes")
+        return row + b"\n"
+
+    # Строка по смещению прямо из отображения файла, без системных вызовов.
+    # У недописанной последней строки перевода строки нет, она читается до конца файла
+    def _read_line(self, fd: int, offset: int) -> bytes:
+        mm = self._mapped(fd, offset)
+        end = mm.find(b"\n", offset)
+        return mm[offset:end if end != -1 else len(mm)]
+
+    # Поля строки по смещению
+    def _read_row(self, fd: int, offset: int) -> list[str]:
+        return self._read_line(fd, offset).decode().rstrip().split(";")
+
+    # Затирание строки пробелами, перевод строки остаётся на месте.
+    # Как и в _set_car_status, сначала на диск уходят буферы, в том числе запись DELETED в журнале
+    def _erase_row(self, fd: int, offset: int) -> None:
+        self.flush()
+        os.pwrite(fd, b" " * len(self._read_line(fd, offset)), offset)
+
+    # Обрезка файла до последнего перевода строки. Строка не длиннее LINE_LENGTH,
+    # поэтому он всегда находится среди последних LINE_LENGTH + 1 байт
+    def _drop_torn_tail(self, fd: int) -> None:
+        size = os.fstat(fd).st_size
+        if size == 0 or os.pread(fd, 1, size - 1) == b"\n":
+            return
+        start = max(0, size - self.LINE_LENGTH - 1)
+        end = os.pread(fd, size - start, start).rfind(b"\n")
+        os.ftruncate(fd, start + end + 1)
+
+    # Последовательное чтение строк из отображённого в память файла.
+    # Недописанный хвост без перевода строки (запись прервалась) считается концом данных
+    def _read_rows(self, fd: int) -> Iterator[bytes]:
+        self.flush()
+        size = os.fstat(fd).st_size
+        if size == 0:
+            return
+        mm = self._mapped(fd, size - 1)
+        offset = 0
+        while offset < size:
+            end = mm.find(b"\n", offset)
+            if end == -1:
+                return
+            yield mm[offset:end]
+            offset = end + 1
+
+    # Отображение файла, покрывающее смещение offset. Строки пишутся целиком,
+    # поэтому если начало строки попало в отображение, то и вся строка тоже;
+    # иначе строка ещё в буфере или дописана позже - буферы сбрасываются и файл переотображается
+    def _mapped(self, fd: int, offset: int) -> mmap.mmap:
+        mm = self._mmaps.get(fd)
+        if mm is None or offset >= len(mm):
+            self.flush()
+            mm = self._mmaps[fd] = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        return mm
+
+    # Учёт продажи (delta=1) или её отмены (delta=-1) в агрегатах по моделям;
+    # цена хранится в копейках, чтобы сравнивать int, а не Decimal. Список цен остаётся
+    # отсортированным, так что число продаж - его длина, а самая дорогая машина - последний элемент
+    # Пока агрегаты не построены, учитывать нечего: они соберутся уже с этой продажей
+    def _count_sale(self, model_id: str, price: int, delta: int) -> None:
+        if self._sold_prices_by_model is None:
+            return
+        prices = self._sold_prices_by_model.setdefault(model_id, [])
+        if delta > 0:
+            bisect.insort(prices, price)
+        else:
+            del prices[bisect.bisect_left(prices, price)]
+        if not prices:
+            del self._sold_prices_by_model[model_id]
+
+    # Цена в копейках прямо из байтов строки, без промежуточного Decimal. Цены пишутся
+    # без экспоненты (format "f"), но строки, записанные раньше через str(), могут её содержать
+    def _price_to_cents(self, price: bytes) -> int:
+        if b"E" in price:
+            return int(Decimal(price.decode()).scaleb(2))
+        whole, _, fraction = price.partition(b".")
+        return int(whole + fraction[:2].ljust(2, b"0"))
+
+    # Модель и цена в копейках из строки машины по смещению, без сборки Car
+    def _model_and_cents(self, offset: int) -> tuple[str, int]:
+        _, model_id, price, _ = self._read_line(self._car_fd, offset).split(b";", 3)
+        return model_id.decode(), self._price_to_cents(price)
+
+    # Смещение, с которого будет записана следующая строка, с учётом ещё не сброшенного буфера
+    def _end_offset(self, fd: int, file_path: str) -> int:
+        return os.fstat(fd).st_size + len(self._dirty_buffers.get(file_path, b""))
+
+    # Путь к бинарному снимку индекса рядом с его текстовым журналом
+    def _snapshot_path(self, index_file_path: str) -> str:
+        return os.path.splitext(index_file_path)[0] + ".pkl"
+
+    # Метод загрузки индекса: снимок целиком одним pickle.load, затем журнал изменений после него.
+    # Журнал может содержать несколько записей по одному ключу, побеждает последняя,
+    # запись со смещением DELETED удаляет ключ
     def _load_index(self, index_file_path: str) -> dict[str, int]:
         index = {}
+        snapshot_path = self._snapshot_path(index_file_path)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, "rb") as f:
+                index = pickle.load(f)
         if os.path.exists(index_file_path):
             with open(index_file_path, "r") as f:
                 for line in f:
-                    key, line_number = line.strip().split(";")
-                    index[key] = int(line_number)
+                    key, offset = line.strip().split(";")
+                    if int(offset) == self.DELETED:
+                        index.pop(key, None)
+                    else:
+                        index[key] = int(offset)
+        self._loaded_indexes[index_file_path] = index
         return index
 
-    # Метод сохранения индекса в файл
-    def _save_index(self, index_file_path: str, index: dict[str, int]) -> None:
-        with open(index_file_path, "w") as f:
-            for key, line_number in sorted(index.items()):
-                f.write(f"{key};{line_number}\n")
+    # Сохранение индекса в снимок и очистка журнала. Снимок собирается в памяти, пишется
+    # одним write() во временный файл и атомарно подменяет старый, так что на диске всегда
+    # лежит целый снимок. Если процесс упадёт до очистки журнала, журнал будет применён
+    # к снимку повторно, что ничего не меняет
+    def _checkpoint_index(self, index_file_path: str, index: dict[str, int]) -> None:
+        snapshot_path = self._snapshot_path(index_file_path)
+        with open(snapshot_path + ".tmp", "wb") as f:
+            f.write(pickle.dumps(index, protocol=5))
+        os.replace(snapshot_path + ".tmp", snapshot_path)
+        os.ftruncate(self._append_fds[index_file_path], 0)
@@ -290,3 +290,328 @@ class TestCarServiceScenarios:
             ModelSaleStats(car_model_name="Pathfinder", brand="Nissan", sales_number=1),
         ]
         assert service.top_models_by_sales() == top_3_models
+
+    def test_reopen_service(self, tmpdir: str, car_data: list[Car], model_data: list[Model]):
+        service = CarService(tmpdir)
+
+        self._fill_initial_data(service, car_data, model_data)
+
+        sale = Sale(
+            sales_number="20240903#KNAGM4A77D5316538",
+            car_vin="KNAGM4A77D5316538",
+            sales_date=datetime(2024, 9, 3),
+            cost=Decimal("2999.99"),
+        )
+        service.sell_car(sale)
+        service.update_vin("JM1BL1TFXD1734246", "UPDBL1TFXD1734246")
+        service.close()
+
+        service = CarService(tmpdir)
+
+        car = service.get_car_info("KNAGM4A77D5316538")
+        assert car is not None
+        assert car.status == CarStatus.sold
+        assert car.sales_cost == sale.cost
+        assert service.get_car_info("JM1BL1TFXD1734246") is None
+        assert service.get_car_info("UPDBL1TFXD1734246") is not None
+
+    def test_delete_sale_after_reopen(self, tmpdir: str, car_data: list[Car], model_data: list[Model]):
+        service = CarService(tmpdir)
+
+        self._fill_initial_data(service, car_data, model_data)
+
+        for vin in ("KNAGM4A77D5316538", "JM1BL1M58C1614725"):
+            service.sell_car(Sale(sales_number=f"20240903#{vin}", car_vin=vin, sales_date=datetime(2024, 9, 3), cost=Decimal("2999.99")))
+
+        service.revert_sale("20240903#KNAGM4A77D5316538")
+        service.close()
+
+        service = CarService(tmpdir)
+
+        with pytest.raises(ValueError):
+            service.revert_sale("20240903#KNAGM4A77D5316538")
+
+        assert service.top_models_by_sales() == [ModelSaleStats(car_model_name="3", brand="Mazda", sales_number=1)]
+
+    def test_reopen_without_close(self, tmpdir: str, car_data: list[Car], model_data: list[Model]):
+        service = CarService(tmpdir)
+
+        self._fill_initial_data(service, car_data[:5], model_data)
+        service.close()
+
+        service = CarService(tmpdir)
+        for car in car_data[5:]:
+            service.add_car(car)
+        service.update_vin("KNAGM4A77D5316538", "UPDGM4A77D5316538")
+        service.flush()
+
+        # Без close() снимок не обновлялся, индекс восстанавливается из снимка и журнала
+        service = CarService(tmpdir)
+
+        assert service.get_car_info("KNAGM4A77D5316538") is None
+        assert service.get_car_info("UPDGM4A77D5316538") is not None
+        assert service.get_car_info("VF1LZL2T4BC242298") is not None
+        assert len(service.get_cars(CarStatus.available)) == 8
+
+    def test_reopen_without_flush_after_sale(self, tmpdir: str, car_data: list[Car], model_data: list[Model]):
+        service = CarService(tmpdir)
+
+        self._fill_initial_data(service, car_data, model_data)
+
+        sale = Sale(
+            sales_number="20240903#KNAGM4A77D5316538",
+            car_vin="KNAGM4A77D5316538",
+            sales_date=datetime(2024, 9, 3),
+            cost=Decimal("2999.99"),
+        )
+        service.sell_car(sale)
+
+        # Без flush() и close(): продажа должна быть на диске вместе со сменой статуса
+        service = CarService(tmpdir)
+
+        car = service.get_car_info("KNAGM4A77D5316538")
+        assert car is not None
+        assert car.status == CarStatus.sold
+        assert car.sales_cost == sale.cost
+        assert service.top_models_by_sales() == [ModelSaleStats(car_model_name="Optima", brand="Kia", sales_number=1)]
+
+        service.revert_sale("20240903#KNAGM4A77D5316538")
+
+        service = CarService(tmpdir)
+
+        car = service.get_car_info("KNAGM4A77D5316538")
+        assert car is not None
+        assert car.status == CarStatus.available
+        assert car.sales_cost is None
+        assert service.top_models_by_sales() == []
+        with pytest.raises(ValueError):
+            service.revert_sale("20240903#KNAGM4A77D5316538")
+
+    def test_sell_sold_car(self, tmpdir: str, car_data: list[Car], model_data: list[Model]):
+        service = CarService(tmpdir)
+
+        self._fill_initial_data(service, car_data, model_data)
+
+        service.sell_car(
+            Sale(
+                sales_number="20240903#KNAGM4A77D5316538",
+                car_vin="KNAGM4A77D5316538",
+                sales_date=datetime(2024, 9, 3),
+                cost=Decimal("2999.99"),
+            )
+        )
+
+        with pytest.raises(ValueError):
+            service.sell_car(
+                Sale(
+                    sales_number="20240904#KNAGM4A77D5316538",
+                    car_vin="KNAGM4A77D5316538",
+                    sales_date=datetime(2024, 9, 4),
+                    cost=Decimal("3100"),
+                )
+            )
+
+        car = service.get_car_info("KNAGM4A77D5316538")
+        assert car is not None
+        assert car.sales_cost == Decimal("2999.99")
+
+        service.revert_sale("20240903#KNAGM4A77D5316538")
+
+        car = service.get_car_info("KNAGM4A77D5316538")
+        assert car is not None
+        assert car.status == CarStatus.available
+        with pytest.raises(ValueError):
+            service.revert_sale("20240904#KNAGM4A77D5316538")
+
+    def test_revert_sale_after_update_vin(self, tmpdir: str, car_data: list[Car], model_data: list[Model]):
+        service = CarService(tmpdir)
+
+        self._fill_initial_data(service, car_data, model_data)
+
+        service.sell_car(
+            Sale(
+                sales_number="20240903#KNAGM4A77D5316538",
+                car_vin="KNAGM4A77D5316538",
+                sales_date=datetime(2024, 9, 3),
+                cost=Decimal("2999.99"),
+            )
+        )
+        service.update_vin("KNAGM4A77D5316538", "UPDGM4A77D5316538")
+
+        service = CarService(tmpdir)
+
+        car = service.get_car_info("UPDGM4A77D5316538")
+        assert car is not None
+        assert car.status == CarStatus.sold
+        assert car.sales_cost == Decimal("2999.99")
+
+        service.revert_sale("20240903#KNAGM4A77D5316538")
+
+        service = CarService(tmpdir)
+
+        car = service.get_car_info("UPDGM4A77D5316538")
+        assert car is not None
+        assert car.status == CarStatus.available
+        assert car.sales_cost is None
+        assert service.top_models_by_sales() == []
+
+    def test_top_3_models_after_update_vin(self, tmpdir: str, car_data: list[Car], model_data: list[Model]):
+        service = CarService(tmpdir)
+
+        self._fill_initial_data(service, car_data, model_data)
+
+        service.sell_car(
+            Sale(
+                sales_number="20240903#KNAGM4A77D5316538",
+                car_vin="KNAGM4A77D5316538",
+                sales_date=datetime(2024, 9, 3),
+                cost=Decimal("2999.99"),
+            )
+        )
+        service.update_vin("KNAGM4A77D5316538", "UPDGM4A77D5316538")
+
+        top_models = [ModelSaleStats(car_model_name="Optima", brand="Kia", sales_number=1)]
+        assert service.top_models_by_sales() == top_models
+        car = service.get_car_info("UPDGM4A77D5316538")
+        assert car is not None
+        assert car.sales_date == datetime(2024, 9, 3)
+
+        service.close()
+        service = CarService(tmpdir)
+
+        assert service.top_models_by_sales() == top_models
+        car = service.get_car_info("UPDGM4A77D5316538")
+        assert car is not None
+        assert car.sales_date == datetime(2024, 9, 3)
+
+    def test_torn_last_row(self, tmpdir: str, car_data: list[Car], model_data: list[Model]):
+        service = CarService(tmpdir)
+
+        self._fill_initial_data(service, car_data, model_data)
+        service.close()
+
+        # Запись строки прервалась: в конце файла нет перевода строки
+        with open(service.car_file_path, "ab") as f:
+            f.write(b"XTA21099043")
+
+        service = CarService(tmpdir)
+
+        available_cars = [car for car in car_data if car.status == CarStatus.available]
+        assert service.get_cars(CarStatus.available) == available_cars
+
+        # Следующая строка не должна склеиться с недописанной
+        new_car = Car(vin="B2", model=1, price=Decimal("2000"), date_start=datetime(2024, 2, 8), status=CarStatus.available)
+        service.add_car(new_car)
+        service.flush()
+
+        service = CarService(tmpdir)
+
+        assert service.get_cars(CarStatus.available) == available_cars + [new_car]
+        car = service.get_car_info("B2")
+        assert car is not None
+        assert car.price == Decimal("2000")
+
+    def test_reopen_after_buffer_overflow(self, tmpdir: str):
+        service = CarService(tmpdir)
+
+        # Строки индекса моделей длиннее коротких строк моделей, так что первым
+        # переполняется буфер журнала индекса
+        for i in range(12000):
+            service.add_model(Model(id=i, name="A", brand="B"))
+            service.add_car(
+                Car(vin=f"V{i}", model=i, price=Decimal("1"), date_start=datetime(2024, 2, 8), status=CarStatus.available)
+            )
+
+        # Без flush() и close(), как после падения процесса
+        service = CarService(tmpdir)
+
+        # Строка без записи в индексе допустима, запись индекса без строки - нет
+        found = 0
+        for i in range(12000):
+            car_info = service.get_car_info(f"V{i}")
+            if car_info is not None:
+                assert car_info.car_model_name == "A"
+                found += 1
+        assert found > 0
+
+    def test_sell_car_with_exponent_price(self, tmpdir: str, model_data: list[Model]):
+        service = CarService(tmpdir)
+
+        for model in model_data:
+            service.add_model(model)
+        service.add_car(
+            Car(vin="KNAGM4A77D5316538", model=1, price=Decimal("1E+3"), date_start=datetime(2024, 2, 8), status=CarStatus.available)
+        )
+        service.add_car(
+            Car(vin="5XYPH4A10GG021831", model=2, price=Decimal("2E+3"), date_start=datetime(2024, 2, 20), status=CarStatus.available)
+        )
+
+        service.sell_car(
+            Sale(
+                sales_number="20240903#KNAGM4A77D5316538",
+                car_vin="KNAGM4A77D5316538",
+                sales_date=datetime(2024, 9, 3),
+                cost=Decimal("1E+3"),
+            )
+        )
+        service.sell_car(
+            Sale(
+                sales_number="20240903#5XYPH4A10GG021831",
+                car_vin="5XYPH4A10GG021831",
+                sales_date=datetime(2024, 9, 3),
+                cost=Decimal("2E+3"),
+            )
+        )
+
+        top_models = [
+            ModelSaleStats(car_model_name="Sorento", brand="Kia", sales_number=1),
+            ModelSaleStats(car_model_name="Optima", brand="Kia", sales_number=1),
+        ]
+        assert service.top_models_by_sales() == top_models
+        car = service.get_car_info("KNAGM4A77D5316538")
+        assert car is not None
+        assert car.price == Decimal("1000")
+
+        service.revert_sale("20240903#KNAGM4A77D5316538")
+
+        assert service.top_models_by_sales() == top_models[:1]
+
+    def test_top_3_models_tie_after_revert_most_expensive_sale(self, tmpdir: str, model_data: list[Model]):
+        service = CarService(tmpdir)
+
+        for model in model_data:
+            service.add_model(model)
+        cars = [
+            ("KNAGM4A77D5316538", 1, Decimal("3000")),
+            ("KNAGM4A77D5316539", 1, Decimal("1000")),
+            ("KNAGM4A77D5316540", 1, Decimal("1500")),
+            ("5XYPH4A10GG021831", 2, Decimal("2000")),
+            ("5XYPH4A10GG021832", 2, Decimal("2000")),
+        ]
+        for vin, model, price in cars:
+            service.add_car(Car(vin=vin, model=model, price=price, date_start=datetime(2024, 2, 8), status=CarStatus.available))
+        for vin, _, price in cars[:2] + cars[3:]:
+            service.sell_car(Sale(sales_number=f"20240903#{vin}", car_vin=vin, sales_date=datetime(2024, 9, 3), cost=price))
+
+        # Продаж поровну, выше модель с самой дорогой машиной
+        assert service.top_models_by_sales() == [
+            ModelSaleStats(car_model_name="Optima", brand="Kia", sales_number=2),
+            ModelSaleStats(car_model_name="Sorento", brand="Kia", sales_number=2),
+        ]
+
+        # После отмены самой дорогой продажи и новой, более дешёвой, продаж снова поровну,
+        # но самая дорогая машина теперь у другой модели
+        service.revert_sale("20240903#KNAGM4A77D5316538")
+        service.sell_car(
+            Sale(
+                sales_number="20240904#KNAGM4A77D5316540",
+                car_vin="KNAGM4A77D5316540",
+                sales_date=datetime(2024, 9, 4),
+                cost=Decimal("1500"),
+            )
+        )
+
+        assert service.top_models_by_sales() == [
+            ModelSaleStats(car_model_name="Sorento", brand="Kia", sales_number=2),
+            ModelSaleStats(car_model_name="Optima", brand="Kia", sales_number=2),
+        ]